@@ -1,146 +1,237 @@
 import time
 
-start_time = time.time()
-print("Beginning script...")
-
 # Standard Libraries
+import os
+import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import Optional, Tuple
 import numpy as np
 import rasterio
 from rasterio.warp import transform_bounds
-from scipy.ndimage import binary_closing, binary_fill_holes, binary_dilation
- 
+
 # Other Self Made Modules
+from worldcover.bbox import finite_bbox
 from worldcover.tiles import find_required_worldcover_tiles
 from worldcover.reprojection import reproject_preprocessed_landmask_tiles_to_s1
+from worldcover.morphology import binary_closing, binary_fill_holes, binary_dilation
 
 # =====================================================
 # PATHS
 # =====================================================
-HH_PATH = Path(
-    "data/input/Browser_images(4)/2025-02-24-00_00_2025-02-24-23_59_Sentinel-1_EW_HH+HV_HH_(Raw).tiff"  #Path to your input HH image
-)
-HV_PATH = Path(
-    "data/input/Browser_images(4)/2025-02-24-00_00_2025-02-24-23_59_Sentinel-1_EW_HH+HV_HV_(Raw).tiff"  #Path to your input HV image
-)
+SCENES = [
+    (
+        Path("data/input/Browser_images(4)/2025-02-24-00_00_2025-02-24-23_59_Sentinel-1_EW_HH+HV_HH_(Raw).tiff"),  #Path to your input HH image
+        Path("data/input/Browser_images(4)/2025-02-24-00_00_2025-02-24-23_59_Sentinel-1_EW_HH+HV_HV_(Raw).tiff"),  #Path to your input HV image
+    ),
+]
 
 WORLDCOVER_DIR = Path("data/worldcover/preprocessed") #Path to preprocessed WorldCover tiles directory
 
 # =====================================================
-# LOAD SENTINEL-1 IMAGE
-# =====================================================
-print("Loading Sentinel-1 HH image...")
-with rasterio.open(HH_PATH) as src:
-    hh = src.read(1).astype("float32")
-    profile = src.profile
-    dst_crs = src.crs
-    dst_transform = src.transform
-    dst_shape = hh.shape
-
-# =====================================================
-# DERIVE AREA OF INTEREST FROM VALID SAR DATA 
+# SETTINGS
 # =====================================================
-print("Computing valid-data bounds from Sentinel-1...")
-
-valid = np.isfinite(hh)
-row_any = valid.any(axis=1)
-col_any = valid.any(axis=0)
-
-if not row_any.any() or not col_any.any():
-    raise RuntimeError("No finite pixels found in the HH image.")
-
-row_min = row_any.argmax()
-row_max = len(row_any) - row_any[::-1].argmax() - 1
-col_min = col_any.argmax()
-col_max = len(col_any) - col_any[::-1].argmax() - 1
+FILL_HOLES = True  #Also mask water fully enclosed by land (e.g. lakes)
+MAX_WORKERS = None  #Scenes processed in parallel; None = half the CPUs
 
-# Convert pixel indices to map coordinates
-left,  top    = rasterio.transform.xy(dst_transform, row_min, col_min, offset="ul")
-right, bottom = rasterio.transform.xy(dst_transform, row_max, col_max, offset="lr")
 
-# Convert to lat/lon
-west, south, east, north = transform_bounds(
-    dst_crs, "EPSG:4326",
-    left, bottom, right, top,
-    densify_pts=21
-)
-
-print(f"AOI (WGS84): W={west:.2f}, S={south:.2f}, E={east:.2f}, N={north:.2f}")
-
-_bounds_tag = f"W{west:.2f}_S{south:.2f}_E{east:.2f}_N{north:.2f}"
-OUT_HH_IMG = Path(f"data/output/hh_masked_{_bounds_tag}.tif")
-OUT_HV_IMG = Path(f"data/output/hv_masked_{_bounds_tag}.tif")
-
-# =====================================================
-# WORLDCOVER TILE SELECTION CALLS
-# =====================================================
-print("Selecting required WorldCover tiles...")
-WC_PATHS = find_required_worldcover_tiles(
-    HH_PATH,
-    WORLDCOVER_DIR,
-    bounds_wgs84=(west, south, east, north),
-    filename_suffix="_preprocessed.tif",
-)
-
-print("Selected WorldCover tiles:")
-for p in WC_PATHS:
-    print(" ", p.name)
-
-# =====================================================
-# REPROJECT WORLDCOVER TILES TO SENTINEL-1 GRID
-# =====================================================
-print("Reprojecting WorldCover tiles to Sentinel-1 grid...")
-land_mask = reproject_preprocessed_landmask_tiles_to_s1(
-    WC_PATHS,
-    dst_transform,
+def read_hv(
+    hv_path: Path,
     dst_crs,
-    dst_shape,
-    num_threads=None,
-)
-
-nodata_count = np.sum(land_mask == 255)
-if nodata_count == land_mask.size:
-    raise RuntimeError(
-        "WorldCover land mask is all nodata within the AOI. "
-        "Check that the required tiles cover the scene bounds."
+    dst_transform: rasterio.Affine,
+    dst_shape: Tuple[int, int],
+) -> np.ndarray:
+    """
+    Read the HV band, checking it shares the HH grid.
+    """
+    with rasterio.open(hv_path) as src:
+        if src.crs != dst_crs or src.transform != dst_transform or src.shape != dst_shape:
+            raise RuntimeError("HV grid does not match HH (CRS/transform/shape).")
+        return src.read(1).astype("float32", copy=False)
+
+
+def write_band(path: Path, array: np.ndarray, profile: dict) -> None:
+    """
+    Write a single-band GeoTIFF.
+    """
+    with rasterio.open(path, "w", **profile) as dst:
+        dst.write(array, 1)
+
+
+def process_scene(
+    hh_path: Path,
+    hv_path: Path,
+    worldcover_dir: Path,
+    num_threads: Optional[int] = None,
+    label: str = "",
+) -> None:
+    """
+    Mask land in one Sentinel-1 HH/HV pair and write both outputs.
+    """
+
+    def log(message: str) -> None:
+        print(f"[{label}] {message}" if label else message)
+
+    # =====================================================
+    # LOAD SENTINEL-1 IMAGE
+    # =====================================================
+    log("Loading Sentinel-1 HH image...")
+    with rasterio.open(hh_path) as src:
+        hh = src.read(1).astype("float32", copy=False)
+        dst_crs = src.crs
+        dst_transform = src.transform
+        dst_shape = hh.shape
+
+        # Output profile, shared by the HH and HV writes
+        img_profile = {
+            **src.profile,
+            "dtype": "float32",
+            "nodata": np.nan,
+            "tiled": True,
+            "blockxsize": 512,
+            "blockysize": 512,
+            "compress": "zstd",
+            "zstd_level": 3,
+            "num_threads": num_threads or "ALL_CPUS",
+            "bigtiff": "IF_SAFER",
+        }
+
+    # GDAL releases the GIL, so HV loads while HH is processed below.
+    log("Loading Sentinel-1 HV image...")
+    io_pool = ThreadPoolExecutor(max_workers=1)
+    hv_future = io_pool.submit(read_hv, hv_path, dst_crs, dst_transform, dst_shape)
+    io_pool.shutdown(wait=False)
+
+    # =====================================================
+    # DERIVE AREA OF INTEREST FROM VALID SAR DATA
+    # =====================================================
+    log("Computing valid-data bounds from Sentinel-1...")
+
+    bbox = finite_bbox(hh)
+    if bbox is None:
+        raise RuntimeError("No finite pixels found in the HH image.")
+
+    row_min, row_max, col_min, col_max = bbox
+
+    # Convert pixel corners to map coordinates (affine maps (col, row) -> (x, y))
+    left,  top    = dst_transform * (col_min, row_min)
+    right, bottom = dst_transform * (col_max + 1, row_max + 1)
+
+    # Convert to lat/lon
+    west, south, east, north = transform_bounds(
+        dst_crs, "EPSG:4326",
+        left, bottom, right, top,
+        densify_pts=21
     )
 
-# =====================================================
-# CLEANING & BUFFING LAND MASK COASTLINE
-# =====================================================
-
-land_mask = land_mask == 1
-land_mask = binary_closing(land_mask, iterations=1)
-land_mask = binary_fill_holes(land_mask)
-land_mask = binary_dilation(land_mask, iterations=2)
-
-# =====================================================
-# BUILD LAND MASK
-# =====================================================
-print("Applying land mask to Sentinel-1 HH...")
-hh_masked = hh
-hh_masked[land_mask] = np.nan
-
-print("Loading Sentinel-1 HV image...")
-with rasterio.open(HV_PATH) as src:
-    if src.crs != dst_crs or src.transform != dst_transform or src.shape != dst_shape:
-        raise RuntimeError("HV grid does not match HH (CRS/transform/shape).")
-    hv = src.read(1).astype("float32")
-
-hv_masked = hv
-hv_masked[land_mask] = np.nan
-
-# =====================================================
-# APPLY MASK TO SENTINEL-1
-# =====================================================
-img_profile = profile.copy()
-img_profile.update(dtype="float32", nodata=np.nan)
-
-with rasterio.open(OUT_HH_IMG, "w", **img_profile) as dst:
-    dst.write(hh_masked, 1)
+    log(f"AOI (WGS84): W={west:.2f}, S={south:.2f}, E={east:.2f}, N={north:.2f}")
+
+    _bounds_tag = f"W{west:.2f}_S{south:.2f}_E{east:.2f}_N{north:.2f}"
+    out_hh_img = Path(f"data/output/hh_masked_{_bounds_tag}.tif")
+    out_hv_img = Path(f"data/output/hv_masked_{_bounds_tag}.tif")
+
+    # =====================================================
+    # WORLDCOVER TILE SELECTION CALLS
+    # =====================================================
+    log("Selecting required WorldCover tiles...")
+    wc_paths = find_required_worldcover_tiles(
+        hh_path,
+        worldcover_dir,
+        bounds_wgs84=(west, south, east, north),
+        filename_suffix="_preprocessed.tif",
+    )
 
-with rasterio.open(OUT_HV_IMG, "w", **img_profile) as dst:
-    dst.write(hv_masked, 1)
+    log("Selected WorldCover tiles:")
+    for p in wc_paths:
+        log(f"  {p.name}")
+
+    # =====================================================
+    # REPROJECT WORLDCOVER TILES TO SENTINEL-1 GRID
+    # =====================================================
+    log("Reprojecting WorldCover tiles to Sentinel-1 grid...")
+    land_mask = reproject_preprocessed_landmask_tiles_to_s1(
+        wc_paths,
+        dst_transform,
+        dst_crs,
+        dst_shape,
+        num_threads=num_threads,
+    )
 
-print("Extended WorldCover land mask complete.")
-print(f"Script ran in {time.time() - start_time:.2f} seconds.")
+    if not (land_mask != 255).any():
+        raise RuntimeError(
+            "WorldCover land mask is all nodata within the AOI. "
+            "Check that the required tiles cover the scene bounds."
+        )
+
+    # =====================================================
+    # CLEANING & BUFFING LAND MASK COASTLINE
+    # =====================================================
+
+    land_mask = land_mask == 1
+    land_mask = binary_closing(land_mask, iterations=1)
+    if FILL_HOLES:
+        land_mask = binary_fill_holes(land_mask)
+    land_mask = binary_dilation(land_mask, iterations=2)
+
+    # =====================================================
+    # BUILD LAND MASK
+    # =====================================================
+    log("Applying land mask to Sentinel-1 HH...")
+    hh_masked = hh
+    np.putmask(hh_masked, land_mask, np.nan)
+
+    hv_masked = hv_future.result()
+    np.putmask(hv_masked, land_mask, np.nan)
+
+    # =====================================================
+    # APPLY MASK TO SENTINEL-1
+    # =====================================================
+    # Compression runs in GDAL without the GIL, so write HH and HV together.
+    with ThreadPoolExecutor(max_workers=2) as io_pool:
+        writes = [
+            io_pool.submit(write_band, out_hh_img, hh_masked, img_profile),
+            io_pool.submit(write_band, out_hv_img, hv_masked, img_profile),
+        ]
+    for write in writes:
+        write.result()
+
+    log("Extended WorldCover land mask complete.")
+
+
+if __name__ == "__main__":
+    start_time = time.time()
+    print("Beginning script...")
+
+    cpu_count = os.cpu_count() or 1
+    max_workers = MAX_WORKERS or max(1, min(len(SCENES), cpu_count // 2))
+    # Split the cores between workers so GDAL warps don't oversubscribe.
+    num_threads = max(1, cpu_count // max_workers)
+
+    total = len(SCENES)
+    failed = 0
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(
+                process_scene,
+                hh_path,
+                hv_path,
+                WORLDCOVER_DIR,
+                num_threads,
+                f"{idx}/{total}",
+            ): hh_path
+            for idx, (hh_path, hv_path) in enumerate(SCENES, start=1)
+        }
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as exc:
+                failed += 1
+                print(f"Skipping {futures[future].name}:")
+                traceback.print_exception(type(exc), exc, exc.__traceback__)
+
+    print(f"Processed {total - failed}/{total} scenes.")
+    print(f"Script ran in {time.time() - start_time:.2f} seconds.")
+
+    if failed:
+        sys.exit(1)
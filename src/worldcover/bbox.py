@@ -0,0 +1,52 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+def finite_bbox(
+    array: np.ndarray,
+    block_rows: int = 256,
+) -> Optional[Tuple[int, int, int, int]]:
+    """
+    Find the bounding box of finite pixels in a 2D array.
+
+    Scans the array in row blocks, reusing one block_rows x width validity
+    buffer, instead of materializing a full-size bool array.
+
+    Returns:
+        (row_min, row_max, col_min, col_max), inclusive, or None if the
+        array has no finite pixels.
+    """
+
+    height, width = array.shape
+
+    # A finite pixel on every edge means the box is the whole array, which
+    # is common for clean scenes and only costs a scan of the border.
+    if (
+        np.isfinite(array[0]).any()
+        and np.isfinite(array[-1]).any()
+        and np.isfinite(array[:, 0]).any()
+        and np.isfinite(array[:, -1]).any()
+    ):
+        return 0, height - 1, 0, width - 1
+
+    row_any = np.zeros(height, dtype=bool)
+    col_any = np.zeros(width, dtype=bool)
+
+    valid_buf = np.empty((min(block_rows, height), width), dtype=bool)
+
+    for start in range(0, height, block_rows):
+        block = array[start:start + block_rows]
+        valid = np.isfinite(block, out=valid_buf[:len(block)])
+        row_any[start:start + block_rows] = valid.any(axis=1)
+        col_any |= valid.any(axis=0)
+
+    if not row_any.any():
+        return None
+
+    row_min = int(row_any.argmax())
+    row_max = height - int(row_any[::-1].argmax()) - 1
+    col_min = int(col_any.argmax())
+    col_max = width - int(col_any[::-1].argmax()) - 1
+
+    return row_min, row_max, col_min, col_max
@@ -0,0 +1,7 @@
+import numpy as np
+
+
+# Land = any non-zero class except open water (80); nodata is 0 or -1.
+# Indexed by the class value cast to uint8, so -1 wraps to 255.
+LAND_LUT = np.ones(256, dtype=bool)
+LAND_LUT[[0, 80, 255]] = False
@@ -1,30 +1,45 @@
 from typing import Tuple
 import numpy as np
-from scipy.ndimage import binary_opening, binary_closing, binary_fill_holes
+
+from worldcover.classes import LAND_LUT
+from worldcover.morphology import binary_opening, binary_closing, binary_fill_holes
+
+
+def clean_land_mask(
+    land_mask: np.ndarray,
+    fill_holes: bool = True,
+) -> np.ndarray:
+    """
+    Morphological cleanup of a boolean land mask.
+
+    Set fill_holes=False to keep enclosed water (lakes) unmasked.
+    """
+
+    # Morphological cleanup on land only to preserve coastal water.
+    land_mask = binary_opening(land_mask, iterations=1)
+    land_mask = binary_closing(land_mask, iterations=2)
+    if fill_holes:
+        land_mask = binary_fill_holes(land_mask)
+
+    return land_mask
 
 
 def build_land_mask(
     worldcover_array: np.ndarray,
     sar_array: np.ndarray,
+    fill_holes: bool = True,
 ) -> Tuple[np.ndarray, np.ndarray]:
     """
     Build a boolean land mask from reprojected WorldCover data and
     apply it to a Sentinel-1 SAR array.
-    """
 
-    # Land = any non-zero class except open water (80); nodata is 0 or -1.
-    land_mask = (
-        (worldcover_array != 0)
-        & (worldcover_array != 80)
-        & (worldcover_array != -1)
-    )
+    Set fill_holes=False to keep enclosed water (lakes) unmasked.
+    """
 
-    # Morphological cleanup on land only to preserve coastal water.
-    land_mask = binary_opening(land_mask, iterations=1)
-    land_mask = binary_closing(land_mask, iterations=2)
-    land_mask = binary_fill_holes(land_mask)
+    land_mask = LAND_LUT[worldcover_array.astype("uint8", copy=False)]
+    land_mask = clean_land_mask(land_mask, fill_holes=fill_holes)
 
     sar_land_removed = sar_array.copy()
-    sar_land_removed[land_mask] = np.nan
+    np.putmask(sar_land_removed, land_mask, np.nan)
 
     return land_mask.astype(bool), sar_land_removed
@@ -1,5 +1,6 @@
 from pathlib import Path
 from typing import List, Tuple, Optional
+import xml.etree.ElementTree as ET
 
 import rasterio
 import numpy as np
@@ -34,3 +35,63 @@ def mosaic_worldcover_tiles(
     wc_mosaic = wc_mosaic[0].astype("uint8")
 
     return wc_mosaic, wc_transform
+
+
+_GDAL_DTYPES = {"uint8": "Byte", "int16": "Int16", "uint16": "UInt16"}
+
+
+def build_worldcover_vrt(tile_paths: List[Path]) -> str:
+    """
+    Describe ESA WorldCover tiles as a single GDAL VRT mosaic.
+
+    Nothing is read except tile headers; rasterio.open() accepts the
+    returned XML directly, and warping from it lets GDAL read only the
+    source windows the destination needs.
+
+    Returns:
+        vrt_xml : VRT document as a string
+    """
+    tiles = []
+    for p in tile_paths:
+        with rasterio.open(p) as src:
+            tiles.append((p, src.bounds, src.shape))
+            if len(tiles) == 1:
+                crs, dtype, nodata = src.crs, src.dtypes[0], src.nodata
+                xres, yres = src.res
+
+    left = min(b.left for _, b, _ in tiles)
+    top = max(b.top for _, b, _ in tiles)
+    right = max(b.right for _, b, _ in tiles)
+    bottom = min(b.bottom for _, b, _ in tiles)
+
+    vrt = ET.Element(
+        "VRTDataset",
+        rasterXSize=str(round((right - left) / xres)),
+        rasterYSize=str(round((top - bottom) / yres)),
+    )
+    ET.SubElement(vrt, "SRS").text = crs.to_wkt()
+    ET.SubElement(vrt, "GeoTransform").text = (
+        f"{left!r}, {xres!r}, 0.0, {top!r}, 0.0, {-yres!r}"
+    )
+
+    band = ET.SubElement(
+        vrt, "VRTRasterBand", dataType=_GDAL_DTYPES[dtype], band="1"
+    )
+    if nodata is not None:
+        ET.SubElement(band, "NoDataValue").text = str(int(nodata))
+
+    for p, bounds, (height, width) in tiles:
+        source = ET.SubElement(band, "SimpleSource")
+        ET.SubElement(source, "SourceFilename", relativeToVRT="0").text = str(p)
+        ET.SubElement(source, "SourceBand").text = "1"
+        size = dict(xSize=str(width), ySize=str(height))
+        ET.SubElement(source, "SrcRect", xOff="0", yOff="0", **size)
+        ET.SubElement(
+            source,
+            "DstRect",
+            xOff=str(round((bounds.left - left) / xres)),
+            yOff=str(round((top - bounds.top) / yres)),
+            **size,
+        )
+
+    return ET.tostring(vrt, encoding="unicode")
@@ -4,6 +4,13 @@ import numpy as np
 import rasterio
 
 
+# WorldCover class -> land mask: nodata (0) -> 255, open water (80) -> 0,
+# every other class -> 1.
+LANDMASK_LUT = np.ones(256, dtype="uint8")
+LANDMASK_LUT[0] = 255
+LANDMASK_LUT[80] = 0
+
+
 def preprocess_worldcover_tiles(
     input_dir: Path,
     output_dir: Path,
@@ -13,6 +20,7 @@ def preprocess_worldcover_tiles(
 
     Land = 1, water = 0, nodata = 255.
     Output filenames preserve bounds and add a '_preprocessed' suffix.
+    Outputs are 512x512-tiled, DEFLATE-compressed GeoTIFFs.
     """
 
     output_dir.mkdir(parents=True, exist_ok=True)
@@ -29,11 +37,20 @@ def preprocess_worldcover_tiles(
             data = src.read(1)
             profile = src.profile
 
-        land_mask = np.zeros(data.shape, dtype="uint8")
-        land_mask[data == 0] = 255
-        land_mask[(data != 0) & (data != 80)] = 1
-
-        profile.update(dtype="uint8", nodata=255, count=1)
+        land_mask = LANDMASK_LUT[data]
+
+        # Tiled so the reprojection's windowed warps decode only the blocks
+        # they touch.
+        profile.update(
+            dtype="uint8",
+            nodata=255,
+            count=1,
+            tiled=True,
+            blockxsize=512,
+            blockysize=512,
+            compress="deflate",
+            num_threads="ALL_CPUS",
+        )
         with rasterio.open(out_path, "w", **profile) as dst:
             dst.write(land_mask, 1)
         print(f"[{idx}/{total}] Saved {out_name}")
@@ -1,54 +1,67 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
 from typing import Tuple, List, Optional, Union
+import math
 import os
 
 import numpy as np
 import rasterio
+from rasterio.crs import CRS
 from rasterio.warp import reproject, Resampling, transform_bounds
 from rasterio.transform import array_bounds
+from rasterio.windows import Window, from_bounds
+from rasterio.windows import transform as window_transform
 
+from worldcover.classes import LAND_LUT
+from worldcover.preprocess import LANDMASK_LUT
+from worldcover.tiles import worldcover_tile_bounds
 
-def reproject_worldcover_to_s1(
-    wc_mosaic: np.ndarray,
-    wc_transform: rasterio.Affine,
-    dst_transform: rasterio.Affine,
-    dst_crs,
-    dst_shape: Tuple[int, int],
-    dst_nodata: int = -1,
-) -> np.ndarray:
-    """
-    Reproject WorldCover mosaic (EPSG:4326) onto the Sentinel-1 grid.
 
-    Returns:
-        wc_reproj : int16 array aligned exactly to Sentinel-1
+@contextmanager
+def _worldcover_source(
+    wc_mosaic: Union[np.ndarray, Path, str],
+    wc_transform: Optional[rasterio.Affine],
+):
     """
+    Yield (source, transform, crs) for reproject() from either an in-memory
+    EPSG:4326 mosaic or a dataset path / VRT XML. Datasets are passed as a
+    band so GDAL reads only the source windows each warp chunk needs.
+    """
+    if isinstance(wc_mosaic, np.ndarray):
+        yield wc_mosaic, wc_transform, "EPSG:4326"
+    else:
+        with rasterio.open(wc_mosaic) as src:
+            yield rasterio.band(src, 1), src.transform, src.crs
 
-    wc_reproj = np.full(dst_shape, dst_nodata, dtype="int16")
-
-    reproject(
-        source=wc_mosaic,
-        destination=wc_reproj,
-        src_transform=wc_transform,
-        src_crs="EPSG:4326",
-        src_nodata=0,              # WorldCover nodata
-        dst_transform=dst_transform,
-        dst_crs=dst_crs,
-        dst_nodata=dst_nodata,
-        resampling=Resampling.nearest,
-    )
 
-    return wc_reproj
+def _gdal_env(gdal_cachemax: int) -> rasterio.Env:
+    """
+    GDAL environment with a block cache of gdal_cachemax MB, so tile blocks
+    shared by neighbouring warp chunks are decoded once.
+    """
+    return rasterio.Env(GDAL_CACHEMAX=gdal_cachemax * 1024 * 1024)
 
 
-def reproject_worldcover_tiles_to_s1(
-    tile_paths: List,
+def reproject_worldcover_to_s1(
+    wc_mosaic: Union[np.ndarray, Path, str],
+    wc_transform: Optional[rasterio.Affine],
     dst_transform: rasterio.Affine,
     dst_crs,
     dst_shape: Tuple[int, int],
     dst_nodata: int = -1,
     num_threads: Optional[Union[int, str]] = None,
+    warp_mem_limit: int = 512,
+    gdal_cachemax: int = 1024,
 ) -> np.ndarray:
     """
-    Reproject individual WorldCover tiles (EPSG:4326) onto the Sentinel-1 grid.
+    Reproject WorldCover mosaic (EPSG:4326) onto the Sentinel-1 grid.
+
+    wc_mosaic is either an array with its wc_transform, or a dataset path /
+    VRT XML (see build_worldcover_vrt), in which case wc_transform is unused.
+    num_threads defaults to all CPUs; warp_mem_limit is GDAL's warp
+    working buffer and gdal_cachemax its block cache, both in MB.
 
     Returns:
         wc_reproj : int16 array aligned exactly to Sentinel-1
@@ -56,145 +69,266 @@ def reproject_worldcover_tiles_to_s1(
 
     wc_reproj = np.full(dst_shape, dst_nodata, dtype="int16")
 
-    height, width = dst_shape
-    dst_left, dst_bottom, dst_right, dst_top = array_bounds(
-        height, width, dst_transform
-    )
-
-    first_write = True
     if num_threads is None or num_threads == "ALL_CPUS":
         num_threads = os.cpu_count() or 1
 
-    for path in tile_paths:
-        with rasterio.open(path) as src:
-            src_left, src_bottom, src_right, src_top = transform_bounds(
-                src.crs,
-                dst_crs,
-                *src.bounds,
-                densify_pts=21,
-            )
-            if (
-                src_right <= dst_left
-                or src_left >= dst_right
-                or src_top <= dst_bottom
-                or src_bottom >= dst_top
-            ):
-                continue
-
+    with _gdal_env(gdal_cachemax):
+        with _worldcover_source(wc_mosaic, wc_transform) as (source, src_transform, src_crs):
             reproject(
-                source=rasterio.band(src, 1),
+                source=source,
                 destination=wc_reproj,
-                src_transform=src.transform,
-                src_crs=src.crs,
+                src_transform=src_transform,
+                src_crs=src_crs,
                 src_nodata=0,              # WorldCover nodata
                 dst_transform=dst_transform,
                 dst_crs=dst_crs,
                 dst_nodata=dst_nodata,
                 resampling=Resampling.nearest,
-                init_dest_nodata=first_write,
                 num_threads=num_threads,
+                warp_mem_limit=warp_mem_limit,
             )
-            first_write = False
 
     return wc_reproj
 
 
-def reproject_worldcover_landmask_tiles_to_s1(
-    tile_paths: List,
+def reproject_to_land_mask(
+    wc_mosaic: Union[np.ndarray, Path, str],
+    wc_transform: Optional[rasterio.Affine],
     dst_transform: rasterio.Affine,
     dst_crs,
     dst_shape: Tuple[int, int],
-    dst_nodata: int = 255,
+    block_rows: int = 1024,
     num_threads: Optional[Union[int, str]] = None,
+    warp_mem_limit: int = 512,
+    gdal_cachemax: int = 1024,
 ) -> np.ndarray:
     """
-    Reproject per-tile WorldCover land mask (EPSG:4326) onto the Sentinel-1 grid.
+    Reproject WorldCover mosaic (EPSG:4326) onto the Sentinel-1 grid and
+    classify it to land in row blocks.
 
-    Land = 1, water = 0, nodata = 255.
-    """
+    Only a block_rows x width int16 class buffer is held at a time, so the
+    full-scene class raster is never allocated. wc_mosaic, num_threads,
+    warp_mem_limit and gdal_cachemax are as in reproject_worldcover_to_s1.
 
-    land_mask = np.full(dst_shape, dst_nodata, dtype="uint8")
+    Returns:
+        land_mask : bool array aligned exactly to Sentinel-1
+    """
 
     height, width = dst_shape
-    dst_left, dst_bottom, dst_right, dst_top = array_bounds(
-        height, width, dst_transform
-    )
+    land_mask = np.empty(dst_shape, dtype=bool)
+    block = np.empty((min(block_rows, height), width), dtype="int16")
 
     if num_threads is None or num_threads == "ALL_CPUS":
         num_threads = os.cpu_count() or 1
 
-    first_write = True
-    for path in tile_paths:
-        with rasterio.open(path) as src:
-            src_left, src_bottom, src_right, src_top = transform_bounds(
-                src.crs,
-                dst_crs,
-                *src.bounds,
-                densify_pts=21,
-            )
-            if (
-                src_right <= dst_left
-                or src_left >= dst_right
-                or src_top <= dst_bottom
-                or src_bottom >= dst_top
-            ):
-                continue
+    with _gdal_env(gdal_cachemax):
+        with _worldcover_source(wc_mosaic, wc_transform) as (source, src_transform, src_crs):
+            for row_off in range(0, height, block_rows):
+                rows = min(block_rows, height - row_off)
+                wc_block = block[:rows]
+                wc_block.fill(-1)
+
+                reproject(
+                    source=source,
+                    destination=wc_block,
+                    src_transform=src_transform,
+                    src_crs=src_crs,
+                    src_nodata=0,              # WorldCover nodata
+                    dst_transform=window_transform(
+                        Window(0, row_off, width, rows), dst_transform
+                    ),
+                    dst_crs=dst_crs,
+                    dst_nodata=-1,
+                    resampling=Resampling.nearest,
+                    num_threads=num_threads,
+                    warp_mem_limit=warp_mem_limit,
+                )
+
+                land_mask[row_off:row_off + rows] = LAND_LUT[
+                    wc_block.astype("uint8", copy=False)
+                ]
 
-            src_data = src.read(1)
-            src_mask = np.zeros(src_data.shape, dtype="uint8")
-            src_mask[src_data == 0] = dst_nodata
-            src_mask[(src_data != 0) & (src_data != 80)] = 1
+    return land_mask
 
-            reproject(
-                source=src_mask,
-                destination=land_mask,
-                src_transform=src.transform,
-                src_crs=src.crs,
-                src_nodata=dst_nodata,
-                dst_transform=dst_transform,
-                dst_crs=dst_crs,
-                dst_nodata=dst_nodata,
-                resampling=Resampling.nearest,
-                init_dest_nodata=first_write,
-                num_threads=num_threads,
-            )
-            first_write = False
 
-    return land_mask
+@lru_cache(maxsize=256)
+def _tile_bounds_in_crs(
+    bounds_4326: Tuple[int, int, int, int],
+    dst_crs_wkt: str,
+) -> Tuple[float, float, float, float]:
+    """
+    Envelope of an EPSG:4326 tile in the destination CRS, cached per
+    (tile, CRS) for the lifetime of the process.
 
+    The envelope also sizes the tile's destination window, so edges are
+    densified enough that a curved 3° edge (several tens of metres of sag
+    between 4 samples) stays within the window's one-pixel pad.
+    """
+    return transform_bounds("EPSG:4326", dst_crs_wkt, *bounds_4326, densify_pts=21)
 
-def reproject_preprocessed_landmask_tiles_to_s1(
+
+def _tile_dst_bounds(path, dst_crs_wkt: str) -> Tuple[float, float, float, float]:
+    """
+    Envelope of a tile in the destination CRS. WorldCover tiles are exact 3°
+    cells, so their bounds come from the filename without opening the file.
+    """
+    bounds_4326 = worldcover_tile_bounds(Path(path).name)
+    if bounds_4326 is None:
+        with rasterio.open(path) as src:
+            return transform_bounds(src.crs, dst_crs_wkt, *src.bounds, densify_pts=21)
+    return _tile_bounds_in_crs(bounds_4326, dst_crs_wkt)
+
+
+def _covering_tile(
     tile_paths: List,
+    dst_bounds: Tuple[float, float, float, float],
     dst_transform: rasterio.Affine,
     dst_crs,
+):
+    """
+    The WorldCover tile whose 3° cell contains the whole destination grid,
+    or None. The grid is padded by a pixel before transforming so the
+    densified envelope cannot undercut its curved edges in EPSG:4326.
+    """
+    left, bottom, right, top = dst_bounds
+    pad_x, pad_y = abs(dst_transform.a), abs(dst_transform.e)
+    west, south, east, north = transform_bounds(
+        dst_crs,
+        "EPSG:4326",
+        left - pad_x,
+        bottom - pad_y,
+        right + pad_x,
+        top + pad_y,
+        densify_pts=21,
+    )
+    if west > east:
+        return None  # Grid crosses the antimeridian
+
+    for path in tile_paths:
+        cell = worldcover_tile_bounds(Path(path).name)
+        if (
+            cell is not None
+            and cell[0] <= west
+            and cell[1] <= south
+            and east <= cell[2]
+            and north <= cell[3]
+        ):
+            return path
+    return None
+
+
+def _padded_window(
+    bounds: Tuple[float, float, float, float],
+    transform: rasterio.Affine,
+    shape: Tuple[int, int],
+) -> Window:
+    """
+    Pixel window covering bounds, padded by one pixel since densified
+    envelopes can slightly undercut curved edges, and clipped to shape.
+    """
+    window = from_bounds(*bounds, transform)
+    height, width = shape
+    row_off = min(max(math.floor(window.row_off) - 1, 0), height)
+    col_off = min(max(math.floor(window.col_off) - 1, 0), width)
+    row_end = max(min(math.ceil(window.row_off + window.height) + 1, height), row_off)
+    col_end = max(min(math.ceil(window.col_off + window.width) + 1, width), col_off)
+    return Window(col_off, row_off, col_end - col_off, row_end - row_off)
+
+
+def _intersection_window(
+    src_bounds: Tuple[float, float, float, float],
+    dst_bounds: Tuple[float, float, float, float],
+    dst_transform: rasterio.Affine,
     dst_shape: Tuple[int, int],
-    dst_nodata: int = 255,
+) -> Window:
+    """
+    Destination pixel window covering the overlap of src_bounds and
+    dst_bounds (both in the destination CRS).
+    """
+    overlap = (
+        max(src_bounds[0], dst_bounds[0]),
+        max(src_bounds[1], dst_bounds[1]),
+        min(src_bounds[2], dst_bounds[2]),
+        min(src_bounds[3], dst_bounds[3]),
+    )
+    return _padded_window(overlap, dst_transform, dst_shape)
+
+
+def _reproject_tiles(
+    tile_paths: List,
+    dst_shape: Tuple[int, int],
+    dtype: str,
+    dst_transform: rasterio.Affine,
+    dst_crs,
+    src_nodata: int,
+    dst_nodata: int,
     num_threads: Optional[Union[int, str]] = None,
+    warp_mem_limit: int = 0,
+    gdal_cachemax: int = 1024,
 ) -> np.ndarray:
     """
-    Reproject preprocessed land mask tiles (land=1, water=0, nodata=255)
-    onto the Sentinel-1 grid.
+    Reproject every tile intersecting the destination grid, one tile per
+    worker thread, and merge valid pixels into a new destination array in
+    destination window order.
+
+    Each worker warps into its own scratch buffer with a single GDAL thread
+    (GDAL releases the GIL), so tiles never contend on the shared array.
+    Scratch buffers cover only the destination window the tile intersects.
+    A lone tile whose window spans the whole grid is warped straight into
+    an uninitialised destination, which GDAL fills with dst_nodata.
     """
 
-    land_mask = np.full(dst_shape, dst_nodata, dtype="uint8")
-
     height, width = dst_shape
-    dst_left, dst_bottom, dst_right, dst_top = array_bounds(
-        height, width, dst_transform
-    )
+    dst_bounds = array_bounds(height, width, dst_transform)
+    dst_left, dst_bottom, dst_right, dst_top = dst_bounds
 
     if num_threads is None or num_threads == "ALL_CPUS":
         num_threads = os.cpu_count() or 1
 
-    first_write = True
-    for path in tile_paths:
+    # Parse the destination CRS once rather than per tile and per warp.
+    dst_crs = CRS.from_user_input(dst_crs)
+    dst_crs_wkt = dst_crs.to_wkt()
+
+    # Scenes inside one WorldCover cell need only that tile, so drop the
+    # other candidates before any bounds are looked up or files opened.
+    covering = _covering_tile(tile_paths, dst_bounds, dst_transform, dst_crs)
+    if covering is not None:
+        tile_paths = [covering]
+
+    def warp_tile(path, destination, window, gdal_threads, init_dest_nodata) -> np.ndarray:
         with rasterio.open(path) as src:
-            src_left, src_bottom, src_right, src_top = transform_bounds(
-                src.crs,
-                dst_crs,
-                *src.bounds,
-                densify_pts=21,
+            reproject(
+                source=rasterio.band(src, 1),
+                destination=destination,
+                src_transform=src.transform,
+                src_crs=src.crs,
+                src_nodata=src_nodata,
+                dst_transform=window_transform(window, dst_transform),
+                dst_crs=dst_crs,
+                dst_nodata=dst_nodata,
+                resampling=Resampling.nearest,
+                init_dest_nodata=init_dest_nodata,
+                num_threads=gdal_threads,
+                warp_mem_limit=warp_mem_limit,
             )
+        return destination
+
+    def warp_to_scratch(path) -> np.ndarray:
+        window = windows[path]
+        # Prefilled here, so GDAL need not write nodata over it again.
+        scratch = np.full((window.height, window.width), dst_nodata, dtype=dtype)
+        return warp_tile(path, scratch, window, 1, init_dest_nodata=False)
+
+    with _gdal_env(gdal_cachemax), ThreadPoolExecutor(max_workers=num_threads) as pool:
+        # Intersection prefilter on cached bounds; only surviving tiles are
+        # opened. Tiles without WorldCover names are opened for their bounds,
+        # so those header reads run on the pool rather than one by one.
+        windows = {}
+        tile_bounds = pool.map(
+            lambda path: _tile_dst_bounds(path, dst_crs_wkt), tile_paths
+        )
+        for path, src_bounds in zip(tile_paths, tile_bounds):
+            src_left, src_bottom, src_right, src_top = src_bounds
             if (
                 src_right <= dst_left
                 or src_left >= dst_right
@@ -202,20 +336,145 @@ def reproject_preprocessed_landmask_tiles_to_s1(
                 or src_bottom >= dst_top
             ):
                 continue
+            windows[path] = _intersection_window(
+                src_bounds, dst_bounds, dst_transform, dst_shape
+            )
 
-            reproject(
-                source=rasterio.band(src, 1),
-                destination=land_mask,
-                src_transform=src.transform,
-                src_crs=src.crs,
-                src_nodata=dst_nodata,
-                dst_transform=dst_transform,
-                dst_crs=dst_crs,
-                dst_nodata=dst_nodata,
-                resampling=Resampling.nearest,
-                init_dest_nodata=first_write,
-                num_threads=num_threads,
+        # Warp and merge top-to-bottom, left-to-right so writes into the
+        # destination walk it roughly sequentially.
+        windows = dict(
+            sorted(windows.items(), key=lambda item: (item[1].row_off, item[1].col_off))
+        )
+
+        if len(windows) == 1:
+            (path, window), = windows.items()
+            if (window.height, window.width) == (height, width):
+                return warp_tile(
+                    path,
+                    np.empty(dst_shape, dtype=dtype),
+                    window,
+                    num_threads,
+                    init_dest_nodata=True,
+                )
+
+        destination = np.full(dst_shape, dst_nodata, dtype=dtype)
+
+        # map() yields in submission order, so later tiles win where their
+        # padded windows overlap exactly as in a serial loop.
+        for path, scratch in zip(windows, pool.map(warp_to_scratch, windows)):
+            np.copyto(
+                destination[windows[path].toslices()],
+                scratch,
+                where=scratch != dst_nodata,
             )
-            first_write = False
+
+    return destination
+
+
+def reproject_worldcover_tiles_to_s1(
+    tile_paths: List,
+    dst_transform: rasterio.Affine,
+    dst_crs,
+    dst_shape: Tuple[int, int],
+    dst_nodata: int = -1,
+    num_threads: Optional[Union[int, str]] = None,
+    warp_mem_limit: int = 512,
+    gdal_cachemax: int = 1024,
+) -> np.ndarray:
+    """
+    Reproject individual WorldCover tiles (EPSG:4326) onto the Sentinel-1 grid.
+
+    For a single GDAL warp, pass build_worldcover_vrt output for the same
+    raw class tiles to reproject_worldcover_to_s1 instead. It assumes class
+    nodata 0, so it does not suit preprocessed land mask tiles, and its
+    nearest picks at class boundaries can differ slightly from these
+    per-tile warps. num_threads, warp_mem_limit and gdal_cachemax are as
+    in reproject_worldcover_to_s1.
+
+    Returns:
+        wc_reproj : int16 array aligned exactly to Sentinel-1
+    """
+
+    return _reproject_tiles(
+        tile_paths,
+        dst_shape,
+        "int16",
+        dst_transform,
+        dst_crs,
+        src_nodata=0,              # WorldCover nodata
+        dst_nodata=dst_nodata,
+        num_threads=num_threads,
+        warp_mem_limit=warp_mem_limit,
+        gdal_cachemax=gdal_cachemax,
+    )
+
+
+def reproject_worldcover_landmask_tiles_to_s1(
+    tile_paths: List,
+    dst_transform: rasterio.Affine,
+    dst_crs,
+    dst_shape: Tuple[int, int],
+    dst_nodata: int = 255,
+    num_threads: Optional[Union[int, str]] = None,
+    warp_mem_limit: int = 512,
+    gdal_cachemax: int = 1024,
+) -> np.ndarray:
+    """
+    Reproject per-tile WorldCover land mask (EPSG:4326) onto the Sentinel-1 grid.
+
+    Land = 1, water = 0, nodata = 255. num_threads, warp_mem_limit and
+    gdal_cachemax are as in reproject_worldcover_to_s1.
+    """
+
+    # Nearest resampling preserves class values, so warp the raw classes and
+    # reclassify once per output pixel instead of once per source pixel.
+    land_mask = _reproject_tiles(
+        tile_paths,
+        dst_shape,
+        "uint8",
+        dst_transform,
+        dst_crs,
+        src_nodata=0,              # WorldCover nodata
+        dst_nodata=0,
+        num_threads=num_threads,
+        warp_mem_limit=warp_mem_limit,
+        gdal_cachemax=gdal_cachemax,
+    )
+
+    landmask_lut = LANDMASK_LUT.copy()
+    landmask_lut[0] = dst_nodata
+    np.take(landmask_lut, land_mask, out=land_mask)
 
     return land_mask
+
+
+def reproject_preprocessed_landmask_tiles_to_s1(
+    tile_paths: List,
+    dst_transform: rasterio.Affine,
+    dst_crs,
+    dst_shape: Tuple[int, int],
+    dst_nodata: int = 255,
+    num_threads: Optional[Union[int, str]] = None,
+    warp_mem_limit: int = 512,
+    gdal_cachemax: int = 1024,
+) -> np.ndarray:
+    """
+    Reproject preprocessed land mask tiles (land=1, water=0, nodata=255)
+    onto the Sentinel-1 grid.
+
+    num_threads, warp_mem_limit and gdal_cachemax are as in
+    reproject_worldcover_to_s1.
+    """
+
+    return _reproject_tiles(
+        tile_paths,
+        dst_shape,
+        "uint8",
+        dst_transform,
+        dst_crs,
+        src_nodata=dst_nodata,
+        dst_nodata=dst_nodata,
+        num_threads=num_threads,
+        warp_mem_limit=warp_mem_limit,
+        gdal_cachemax=gdal_cachemax,
+    )
@@ -1,5 +1,7 @@
+from functools import lru_cache
 from pathlib import Path
-import math
+import os
+import re
 import rasterio
 from rasterio.warp import transform_bounds
 
@@ -9,9 +11,10 @@ def snap_to_worldcover_grid(value: float) -> int:
     Snap latitude or longitude to the ESA WorldCover 3° grid.
     Handles negative coordinates correctly.
     """
-    return int(math.floor(value / 3.0) * 3)
+    return int(value // 3) * 3
 
 
+@lru_cache(maxsize=1024)
 def worldcover_tile_name(lat: int, lon: int, suffix: str = "_Map.tif") -> str:
     """
     Construct an ESA WorldCover tile filename from
@@ -22,7 +25,68 @@ def worldcover_tile_name(lat: int, lon: int, suffix: str = "_Map.tif") -> str:
     return f"ESA_WorldCover_10m_2021_V200_{lat_str}{lon_str}{suffix}"
 
 
-from typing import Union, List, Optional, Tuple
+from typing import Union, List, Optional, Tuple, FrozenSet
+
+
+_TILE_NAME_RE = re.compile(r"ESA_WorldCover_10m_2021_V200_([NS])(\d{2})([EW])(\d{3})")
+
+
+def worldcover_tile_bounds(name: str) -> Optional[Tuple[int, int, int, int]]:
+    """
+    Inverse of worldcover_tile_name: the (west, south, east, north) bounds
+    in degrees of the 3° tile a filename refers to, or None if the name
+    does not follow the WorldCover convention.
+    """
+    match = _TILE_NAME_RE.search(name)
+    if match is None:
+        return None
+    lat_hemi, lat, lon_hemi, lon = match.groups()
+    south = int(lat) if lat_hemi == "N" else -int(lat)
+    west = int(lon) if lon_hemi == "E" else -int(lon)
+    return west, south, west + 3, south + 3
+
+
+@lru_cache(maxsize=16)
+def _list_worldcover_dir(worldcover_dir: Path) -> FrozenSet[str]:
+    """
+    Filenames in a WorldCover tile directory, listed once per process.
+    scandir reports file types with the listing, so the is_file filter
+    needs no per-entry stat on most filesystems.
+    """
+    with os.scandir(worldcover_dir) as entries:
+        return frozenset(entry.name for entry in entries if entry.is_file())
+
+
+@lru_cache(maxsize=64)
+def _find_tiles_cached(
+    snapped_bounds: Tuple[int, int, int, int],
+    worldcover_dir: Path,
+    filename_suffix: str,
+) -> Tuple[Path, ...]:
+    """
+    Existing tiles covering bounds already snapped outward to the 3° grid.
+    """
+
+    west, south, east, north = snapped_bounds
+
+    # -------------------------------------------------
+    # Select intersecting WorldCover tiles (3° grid)
+    # -------------------------------------------------
+    # Every cell of the snapped range intersects the bounds, so no per-cell
+    # test is needed.
+    tiles = {
+        worldcover_tile_name(lat, lon, suffix=filename_suffix)
+        for lat in range(south, north, 3)
+        for lon in range(west, east, 3)
+    }
+
+    # -------------------------------------------------
+    # Resolve existing paths
+    # -------------------------------------------------
+    existing = _list_worldcover_dir(worldcover_dir)
+
+    return tuple(worldcover_dir / t for t in sorted(tiles) if t in existing)
+
 
 def find_required_worldcover_tiles(
     s1_path: Union[Path, str],
@@ -35,7 +99,8 @@ def find_required_worldcover_tiles(
     Determine which ESA WorldCover 3° tiles intersect
     the Sentinel-1 raster footprint.
 
-    Returns a list of existing tile paths.
+    Returns a list of existing tile paths. Results and directory listings
+    are cached for the lifetime of the process.
     """
 
     if bounds_wgs84 is None:
@@ -58,43 +123,17 @@ def find_required_worldcover_tiles(
     else:
         west, south, east, north = bounds_wgs84
 
-    # -------------------------------------------------
-    # Select intersecting WorldCover tiles (3° grid)
-    # -------------------------------------------------
-    tiles = set()
-
-    lat = snap_to_worldcover_grid(south)
-    while lat < north:
-        lon = snap_to_worldcover_grid(west)
-        while lon < east:
-            tile_s = lat
-            tile_n = lat + 3
-            tile_w = lon
-            tile_e = lon + 3
-
-            intersects = not (
-                tile_e <= west or
-                tile_w >= east or
-                tile_n <= south or
-                tile_s >= north
-            )
-
-            if intersects:
-                tiles.add(worldcover_tile_name(lat, lon, suffix=filename_suffix))
-
-            lon += 3
-        lat += 3
-
-    # -------------------------------------------------
-    # Resolve existing paths
-    # -------------------------------------------------
-    paths = []
-    worldcover_dir = Path(worldcover_dir)
-
-    for t in sorted(tiles):
-        p = worldcover_dir / t
-        if p.exists():
-            paths.append(p)
+    # Any tile touching the bounds also touches the bounds snapped outward
+    # to the 3° grid, so scenes over the same tiles share one cache entry.
+    snapped_bounds = (
+        snap_to_worldcover_grid(west),
+        snap_to_worldcover_grid(south),
+        -snap_to_worldcover_grid(-east),
+        -snap_to_worldcover_grid(-north),
+    )
+    paths = list(
+        _find_tiles_cached(snapped_bounds, Path(worldcover_dir), filename_suffix)
+    )
 
     if not paths:
         raise RuntimeError("No matching WorldCover tiles found.")